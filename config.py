@@ -15,6 +15,8 @@ ALLOWED_EXTENSIONS = {".csv", ".xlsx"}
 
 REPORT_TIMEOUT_SECONDS = 45
 
+MAX_REPORT_WORKERS = 2
+
 ALLOWED_IMPORTS = {"pandas", "sqlite3", "gradio", "json"}
 
 FORBIDDEN_PATTERNS = [
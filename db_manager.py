@@ -1,8 +1,10 @@
-import hashlib
-import json
+import functools
 import logging
+import os
 import sqlite3
 import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -19,9 +21,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_CONN = None
+_DB_LOCK = threading.Lock()
+_INITIALIZED = False
+
+
+def _get_conn():
+    global _CONN
+    if _CONN is None:
+        config.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _CONN = sqlite3.connect(config.DB_PATH, check_same_thread=False)
+        _CONN.execute("PRAGMA journal_mode=WAL")
+        _CONN.execute("PRAGMA synchronous=NORMAL")
+        _CONN.execute("PRAGMA temp_store=MEMORY")
+        _CONN.execute("PRAGMA cache_size=-65536")
+    return _CONN
+
+
 def _init_db():
-    config.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(config.DB_PATH)
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+    conn = _get_conn()
     conn.execute("""
         CREATE TABLE IF NOT EXISTS data_files (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,12 +53,9 @@ def _init_db():
     """)
     conn.execute("""
         CREATE TABLE IF NOT EXISTS data_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_hash INTEGER PRIMARY KEY,
             file_id INTEGER NOT NULL,
-            row_hash TEXT NOT NULL,
-            data_json TEXT NOT NULL,
-            FOREIGN KEY (file_id) REFERENCES data_files(id),
-            UNIQUE(row_hash)
+            FOREIGN KEY (file_id) REFERENCES data_files(id)
         )
     """)
     conn.execute("""
@@ -50,12 +68,7 @@ def _init_db():
         )
     """)
     conn.commit()
-    conn.close()
-
-
-def _get_file_hash(row_data):
-    row_str = json.dumps(row_data, sort_keys=True, default=str)
-    return hashlib.sha256(row_str.encode()).hexdigest()
+    _INITIALIZED = True
 
 
 def _get_table_columns(conn, table_name):
@@ -63,10 +76,6 @@ def _get_table_columns(conn, table_name):
     return {row[1] for row in cursor.fetchall()}
 
 
-def _normalize_column_name(col):
-    return col.strip().replace(" ", "_").lower()
-
-
 def _infer_sql_type(dtype):
     if pd.api.types.is_integer_dtype(dtype):
         return "INTEGER"
@@ -78,67 +87,89 @@ def _infer_sql_type(dtype):
         return "TEXT"
 
 
-def _process_file(file_path: Path) -> tuple[int, int]:
+def _parse_file(file_path: Path) -> tuple[pd.DataFrame, list[int]]:
     suffix = file_path.suffix.lower()
     if suffix == ".csv":
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, engine="pyarrow")
     elif suffix == ".xlsx":
-        df = pd.read_excel(file_path)
+        df = pd.read_excel(file_path, engine="calamine")
     else:
         raise ValueError(f"Unsupported file type: {suffix}")
 
-    df.columns = df.columns.map(_normalize_column_name)
+    df.columns = df.columns.str.strip().str.replace(" ", "_", regex=False).str.lower()
+    for col in df.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        df[col] = df[col].astype(str)
 
-    conn = sqlite3.connect(config.DB_PATH)
-    cursor = conn.cursor()
+    hashes = pd.util.hash_pandas_object(df, index=False).values.view("i8").tolist()
+    return df, hashes
 
-    table_name = "data_records"
-    existing_cols = _get_table_columns(conn, table_name)
-    existing_cols.discard("id")
-    existing_cols.discard("file_id")
-    existing_cols.discard("row_hash")
-    existing_cols.discard("data_json")
 
-    new_cols = set(df.columns) - existing_cols
-    for col in new_cols:
-        col_type = _infer_sql_type(df[col].dtype)
-        alter_sql = f'ALTER TABLE {table_name} ADD COLUMN "{col}" {col_type}'
-        cursor.execute(alter_sql)
-        logger.info(f"Schema evolution: Added column {col} ({col_type})")
+def _store_dataframe(df: pd.DataFrame, hashes: list[int], filename: str) -> tuple[int, int]:
+    conn = _get_conn()
 
-    conn.commit()
+    with _DB_LOCK, conn:
+        cursor = conn.cursor()
 
-    cursor.execute("SELECT MAX(id) FROM data_files")
-    max_file_id = cursor.fetchone()[0] or 0
-    file_id = max_file_id + 1
+        table_name = "data_records"
+        existing_cols = _get_table_columns(conn, table_name)
+        existing_cols.discard("row_hash")
+        existing_cols.discard("file_id")
 
-    cursor.execute(
-        "INSERT INTO data_files (filename, imported_at, row_count) VALUES (?, ?, ?)",
-        (file_path.name, datetime.now().isoformat(), len(df))
-    )
-    conn.commit()
+        dtypes = df.dtypes.to_dict()
+        new_cols = set(df.columns) - existing_cols
+        for col in new_cols:
+            col_type = _infer_sql_type(dtypes[col])
+            alter_sql = f'ALTER TABLE {table_name} ADD COLUMN "{col}" {col_type}'
+            cursor.execute(alter_sql)
+            logger.info(f"Schema evolution: Added column {col} ({col_type})")
 
-    imported_count = 0
-    skipped_count = 0
+        cursor.execute(
+            "INSERT INTO data_files (filename, imported_at, row_count) VALUES (?, ?, ?)",
+            (filename, datetime.now().isoformat(), len(df))
+        )
+        file_id = cursor.lastrowid
+
+        col_list = ", ".join(f'"{c}"' for c in df.columns)
+        placeholders = ", ".join(["?"] * (len(df.columns) + 2))
+        records = df.astype(object).where(df.notna(), None)
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO data_records (row_hash, file_id, {col_list}) VALUES ({placeholders})',
+            [(row_hash, file_id, *row) for row_hash, row in zip(hashes, records.itertuples(index=False, name=None))]
+        )
+        imported_count = cursor.rowcount
+        skipped_count = len(df) - imported_count
 
-    for _, row in df.iterrows():
-        row_data = row.to_dict()
-        row_hash = _get_file_hash(row_data)
+    logger.info(f"Processed {filename}: {imported_count} imported, {skipped_count} skipped (duplicates)")
+    return imported_count, skipped_count
 
-        try:
-            cursor.execute(
-                "INSERT INTO data_records (file_id, row_hash, data_json) VALUES (?, ?, ?)",
-                (file_id, row_hash, json.dumps(row_data, default=str))
-            )
-            imported_count += 1
-        except sqlite3.IntegrityError:
-            skipped_count += 1
 
-    conn.commit()
-    conn.close()
+def _archive_file(file_path: Path) -> str:
+    archive_path = config.DATA_ARCHIVE_DIR / file_path.name
+    counter = 1
+    while archive_path.exists():
+        archive_path = config.DATA_ARCHIVE_DIR / f"{file_path.stem}_{counter}{file_path.suffix}"
+        counter += 1
+    shutil.move(str(file_path), str(archive_path))
+    return archive_path.name
 
-    logger.info(f"Processed {file_path.name}: {imported_count} imported, {skipped_count} skipped (duplicates)")
-    return imported_count, skipped_count
+
+def list_pending_files() -> list[Path]:
+    return [
+        file_path for file_path in config.DATA_IN_DIR.iterdir()
+        if file_path.is_file() and file_path.suffix.lower() in config.ALLOWED_EXTENSIONS
+    ]
+
+
+def ingest_one(file_path: Path) -> dict:
+    _init_db()
+    df, hashes = _parse_file(file_path)
+    imported, skipped = _store_dataframe(df, hashes, file_path.name)
+    return {
+        "file": file_path.name,
+        "imported": imported,
+        "skipped": skipped,
+        "archived": _archive_file(file_path)
+    }
 
 
 def ingest_new_files() -> dict:
@@ -149,23 +180,21 @@ def ingest_new_files() -> dict:
         "errors": []
     }
 
-    for file_path in config.DATA_IN_DIR.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in config.ALLOWED_EXTENSIONS:
+    pending = list_pending_files()
+    if not pending:
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(len(pending), os.cpu_count())) as executor:
+        futures = [executor.submit(_parse_file, file_path) for file_path in pending]
+        for file_path, future in zip(pending, futures):
             try:
-                imported, skipped = _process_file(file_path)
-                archive_path = config.DATA_ARCHIVE_DIR / file_path.name
-                counter = 1
-                while archive_path.exists():
-                    stem = file_path.stem
-                    suffix = file_path.suffix
-                    archive_path = config.DATA_ARCHIVE_DIR / f"{stem}_{counter}{suffix}"
-                    counter += 1
-                shutil.move(str(file_path), str(archive_path))
+                df, hashes = future.result()
+                imported, skipped = _store_dataframe(df, hashes, file_path.name)
                 results["processed"].append({
                     "file": file_path.name,
                     "imported": imported,
                     "skipped": skipped,
-                    "archived": archive_path.name
+                    "archived": _archive_file(file_path)
                 })
             except Exception as e:
                 logger.error(f"Error processing {file_path.name}: {e}")
@@ -176,56 +205,69 @@ def ingest_new_files() -> dict:
 
 def get_schema() -> dict:
     _init_db()
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _get_conn()
     cursor = conn.execute("PRAGMA table_info(data_records)")
     columns = {row[1]: row[2] for row in cursor.fetchall()}
-    conn.close()
     return columns
 
 
-def get_all_data() -> pd.DataFrame:
+def get_all_data(limit: int | None = None, columns: list[str] | None = None) -> pd.DataFrame:
     _init_db()
-    conn = sqlite3.connect(config.DB_PATH)
-    df = pd.read_sql_query("SELECT data_json FROM data_records", conn)
-    conn.close()
-    if not df.empty:
-        df["data"] = df["data_json"].apply(json.loads)
-        df = df["data"].apply(pd.Series)
-        df = df.drop(columns=["data_json"], errors="ignore")
-    return df
+    conn = _get_conn()
+    col_list = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+    query = f"SELECT {col_list} FROM data_records"
+    params = ()
+    if limit is not None:
+        query += " LIMIT ?"
+        params = (limit,)
+    return pd.read_sql_query(query, conn, params=params)
 
 
 def save_report(name: str, code: str) -> bool:
     _init_db()
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _get_conn()
     now = datetime.now().isoformat()
     try:
-        conn.execute(
-            "INSERT INTO reports (name, code, created_at, updated_at) VALUES (?, ?, ?, ?)",
-            (name, code, now, now)
-        )
-        conn.commit()
-        conn.close()
+        with _DB_LOCK, conn:
+            conn.execute(
+                "INSERT INTO reports (name, code, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (name, code, now, now)
+            )
+        _reports_snapshot.cache_clear()
+        _reports_by_name.cache_clear()
         logger.info(f"Report saved: {name}")
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         logger.warning(f"Report already exists: {name}")
         return False
 
 
-def get_reports() -> list[dict]:
+def _report_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "code": row[2],
+        "created_at": row[3],
+        "updated_at": row[4]
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _reports_snapshot() -> tuple[dict, ...]:
     _init_db()
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _get_conn()
     cursor = conn.execute("SELECT id, name, code, created_at, updated_at FROM reports ORDER BY name")
-    reports = []
-    for row in cursor.fetchall():
-        reports.append({
-            "id": row[0],
-            "name": row[1],
-            "code": row[2],
-            "created_at": row[3],
-            "updated_at": row[4]
-        })
-    conn.close()
-    return reports
+    return tuple(_report_from_row(row) for row in cursor.fetchall())
+
+
+@functools.lru_cache(maxsize=1)
+def _reports_by_name() -> dict[str, dict]:
+    return {report["name"]: report for report in _reports_snapshot()}
+
+
+def get_reports() -> list[dict]:
+    return list(_reports_snapshot())
+
+
+def get_report_by_name(name: str) -> dict | None:
+    return _reports_by_name().get(name)
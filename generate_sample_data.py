@@ -1,51 +1,40 @@
-import csv
-import random
-from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 
 frame_brands = ["Ray-Ban", "Oakley", "Prada", "Warby Parker", "Oakley", "Tom Ford", "Coach", "Michael Kors", "Burberry", "Versace"]
 frame_styles = ["Aviator", "Wayfarer", "Round", "Cat-eye", "Rectangle", "Oval", "Square", "Shield", "Sport"]
 lens_types = ["Single Vision", "Progressive", "Bifocal", "Polychromatic"]
 materials = ["Acetate", "Titanium", "Metal", "Memory Metal", "TR-90", "Combination"]
 prescriptions = ["-3.00", "-2.50", "-2.00", "-1.50", "-1.00", "-0.50", "0.00", "+0.50", "+1.00", "+1.50", "+2.00", "+2.50", "+3.00"]
+zip_codes = ["10001", "90210", "60601", "33101", "02101", "98101", "75201", "85001"]
+opticians = ["Dr. Smith", "Dr. Johnson", "Dr. Williams", "Dr. Brown", "Dr. Davis"]
 
-def random_date(start, end):
-    delta = end - start
-    random_days = random.randint(0, delta.days)
-    return (start + timedelta(days=random_days)).strftime("%Y-%m-%d")
-
-start_date = datetime(2024, 1, 1)
-end_date = datetime(2025, 12, 31)
-
-rows = []
-for i in range(500):
-    brand = random.choice(frame_brands)
-    style = random.choice(frame_styles)
-    material = random.choice(materials)
-    lens = random.choice(lens_types)
-    rx = random.choice(prescriptions)
-    qty = random.randint(1, 3)
-    price = round(random.uniform(99, 450), 2)
-    age = random.randint(18, 85)
-    zip_code = random.choice(["10001", "90210", "60601", "33101", "02101", "98101", "75201", "85001"])
-    
-    rows.append({
-        "sale_date": random_date(start_date, end_date),
-        "frame_brand": brand,
-        "frame_style": style,
-        "material": material,
-        "lens_type": lens,
-        "prescription": rx,
-        "quantity": qty,
-        "unit_price": price,
-        "total": round(price * qty, 2),
-        "customer_age": age,
-        "customer_zip": zip_code,
-        "optician": random.choice(["Dr. Smith", "Dr. Johnson", "Dr. Williams", "Dr. Brown", "Dr. Davis"])
-    })
-
-with open("data-in/sample_optical_sales.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-    writer.writeheader()
-    writer.writerows(rows)
-
-print(f"Generated {len(rows)} rows in data-in/sample_optical_sales.csv")
+N = 500
+
+rng = np.random.default_rng()
+
+start_date = pd.Timestamp(2024, 1, 1)
+end_date = pd.Timestamp(2025, 12, 31)
+days = (end_date - start_date).days
+
+quantity = rng.integers(1, 4, size=N)
+unit_price = np.round(rng.uniform(99, 450, size=N), 2)
+
+df = pd.DataFrame({
+    "sale_date": (start_date + pd.to_timedelta(rng.integers(0, days + 1, size=N), unit="D")).strftime("%Y-%m-%d"),
+    "frame_brand": rng.choice(frame_brands, size=N),
+    "frame_style": rng.choice(frame_styles, size=N),
+    "material": rng.choice(materials, size=N),
+    "lens_type": rng.choice(lens_types, size=N),
+    "prescription": rng.choice(prescriptions, size=N),
+    "quantity": quantity,
+    "unit_price": unit_price,
+    "total": np.round(unit_price * quantity, 2),
+    "customer_age": rng.integers(18, 86, size=N),
+    "customer_zip": rng.choice(zip_codes, size=N),
+    "optician": rng.choice(opticians, size=N),
+})
+
+df.to_csv("data-in/sample_optical_sales.csv", index=False)
+
+print(f"Generated {len(df)} rows in data-in/sample_optical_sales.csv")
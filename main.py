@@ -1,17 +1,27 @@
 import ast
-import importlib
+import builtins
+import concurrent.futures
+import functools
+import hashlib
 import io
 import json
 import logging
 import multiprocessing
+import os
+import queue
+import re
 import sys
+import threading
 import time
 import traceback
 from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
 
 import gradio as gr
 from gradio import Theme
+import orjson
 import pandas as pd
+import pyarrow as pa
 import sqlite3
 
 import config
@@ -188,58 +198,253 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_FORBIDDEN_RE = (
+    re.compile("|".join(re.escape(p) for p in config.FORBIDDEN_PATTERNS))
+    if config.FORBIDDEN_PATTERNS else None
+)
+
+_SCAN_CONFIG_SIG = (frozenset(config.ALLOWED_IMPORTS), tuple(config.FORBIDDEN_PATTERNS))
+
+
+class _ImportScanner(ast.NodeVisitor):
+    def __init__(self):
+        self.error = ""
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name not in config.ALLOWED_IMPORTS:
+                self.error = self.error or f"Forbidden import: {alias.name}"
+
+    def visit_ImportFrom(self, node):
+        if node.module and node.module not in config.ALLOWED_IMPORTS:
+            self.error = self.error or f"Forbidden import: {node.module}"
+
+
 def _scan_code_safety(code: str) -> tuple[bool, str]:
+    return _scan_code_cached(code, _SCAN_CONFIG_SIG)
+
+
+@functools.lru_cache(maxsize=256)
+def _scan_code_cached(code: str, config_sig) -> tuple[bool, str]:
+    if _FORBIDDEN_RE is not None:
+        match = _FORBIDDEN_RE.search(code)
+        if match:
+            return False, f"Forbidden pattern detected: {match.group(0)}"
+
     try:
         tree = ast.parse(code)
     except SyntaxError as e:
         return False, f"Syntax error: {e}"
 
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                if alias.name not in config.ALLOWED_IMPORTS:
-                    return False, f"Forbidden import: {alias.name}"
-        elif isinstance(node, ast.ImportFrom):
-            if node.module and node.module not in config.ALLOWED_IMPORTS:
-                return False, f"Forbidden import: {node.module}"
-
-    code_check = code
-    for pattern in config.FORBIDDEN_PATTERNS:
-        if pattern in code_check:
-            return False, f"Forbidden pattern detected: {pattern}"
+    scanner = _ImportScanner()
+    scanner.visit(tree)
+    if scanner.error:
+        return False, scanner.error
 
     return True, ""
 
 
-def _execute_report_in_process(code: str, db_path: str, result_queue: multiprocessing.Queue):
+_REPORT_POOL = None
+
+_MP_CTX = multiprocessing.get_context(
+    "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+)
+
+
+def _preload_libs():
+    import pandas
+    import pyarrow
+    import sqlite3
+    import json
+
+
+_WORKER_RO_CONNS = {}
+
+
+def _get_ro_conn(db_path: str) -> sqlite3.Connection:
+    conn = _WORKER_RO_CONNS.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro&cache=shared", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA read_uncommitted=1")
+        conn.execute("PRAGMA mmap_size=1073741824")
+        conn.execute("PRAGMA cache_size=-65536")
+        _WORKER_RO_CONNS[db_path] = conn
+    return conn
+
+
+_CURRENT_DB_PATH = None
+
+
+def _safe_import(name, *args, **kwargs):
+    root = name.split(".")[0]
+    if root not in config.ALLOWED_IMPORTS:
+        raise ImportError(f"Forbidden import: {name}")
+    if root == "sqlite3":
+        return _RestrictedSqlite(_CURRENT_DB_PATH)
+    return builtins.__import__(name, *args, **kwargs)
+
+
+_SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "len", "range", "enumerate", "sum", "min", "max", "sorted", "reversed",
+        "dict", "list", "tuple", "set", "frozenset", "zip", "map", "filter",
+        "float", "int", "str", "bool", "bytes", "isinstance", "issubclass",
+        "print", "abs", "round", "any", "all", "iter", "next",
+        "Exception", "ValueError", "TypeError", "KeyError", "IndexError",
+        "AttributeError", "RuntimeError", "ZeroDivisionError", "StopIteration",
+    )
+}
+_SAFE_BUILTINS["__import__"] = _safe_import
+
+_COMPILED_CACHE = {}
+
+
+def _compile_report(code: str):
+    key = hashlib.blake2b(code.encode(), digest_size=16).digest()
+    compiled = _COMPILED_CACHE.get(key)
+    if compiled is None:
+        compiled = compile(code, "<report>", "exec", optimize=2)
+        _COMPILED_CACHE[key] = compiled
+    return compiled
+
+
+_RECORDS_CACHE = {}
+
+
+def load_records_df(db_path: str) -> pd.DataFrame:
+    conn = _get_ro_conn(db_path)
+    rowcount = conn.execute("SELECT COUNT(*) FROM data_records").fetchone()[0]
+    key = (os.path.getmtime(db_path), rowcount)
+    entry = _RECORDS_CACHE.get(db_path)
+    if entry and entry[0] == key:
+        return entry[1].copy()
+    df = pd.read_sql_query("SELECT * FROM data_records", conn)
+    _RECORDS_CACHE[db_path] = (key, df)
+    return df.copy()
+
+
+class _PooledConnection:
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+        conn.row_factory = None
+        conn.text_factory = str
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+class _RestrictedSqlite:
+    def __init__(self, db_path):
+        self._db_path = db_path
+
+    def connect(self, *args, **kwargs):
+        return _PooledConnection(_get_ro_conn(self._db_path))
+
+    def __getattr__(self, name):
+        return getattr(sqlite3, name)
+
+
+def _dataframe_to_arrow_bytes(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_bytes_to_dataframe(buf: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(buf).read_all().to_pandas()
+
+
+_SHM_MIN_BYTES = 1 << 20
+
+
+def _dataframe_to_shm(buf: bytes) -> tuple[str, int]:
+    shm = shared_memory.SharedMemory(create=True, size=len(buf))
+    shm.buf[:len(buf)] = buf
+    shm.close()
+    return shm.name, len(buf)
+
+
+def _dataframe_from_shm(name: str, size: int) -> pd.DataFrame:
+    shm = shared_memory.SharedMemory(name=name)
     try:
-        import pandas
-        import sqlite3
-        import json
+        return _arrow_bytes_to_dataframe(bytes(shm.buf[:size]))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _get_report_pool():
+    global _REPORT_POOL
+    if _REPORT_POOL is None:
+        resource_tracker.ensure_running()
+        _REPORT_POOL = concurrent.futures.ProcessPoolExecutor(
+            max_workers=config.MAX_REPORT_WORKERS,
+            mp_context=_MP_CTX,
+            initializer=_preload_libs,
+        )
+    return _REPORT_POOL
+
+
+def _recycle_report_pool():
+    global _REPORT_POOL
+    if _REPORT_POOL is not None:
+        for process in _REPORT_POOL._processes.values():
+            process.terminate()
+        _REPORT_POOL.shutdown(wait=False, cancel_futures=True)
+        _REPORT_POOL = None
 
+
+def _execute_report_in_process(code: str, db_path: str) -> tuple[str, any]:
+    global _CURRENT_DB_PATH
+    _CURRENT_DB_PATH = db_path
+    try:
         restricted_globals = {
-            "__builtins__": {},
-            "pandas": pandas,
-            "sqlite3": sqlite3,
+            "__builtins__": dict(_SAFE_BUILTINS),
+            "pandas": pd,
+            "sqlite3": _RestrictedSqlite(db_path),
             "json": json,
             "db_path": db_path,
+            "get_conn": lambda: _PooledConnection(_get_ro_conn(db_path)),
+            "load_records_df": load_records_df,
         }
 
-        conn = sqlite3.connect(db_path + "?mode=ro", uri=True)
-        restricted_locals = {}
-
-        exec(code, restricted_globals, restricted_locals)
-
-        if "generate_report" in restricted_locals:
-            result = restricted_locals["generate_report"](db_path)
-            result_queue.put(("success", result))
+        exec(_compile_report(code), restricted_globals)
+
+        generate_report = restricted_globals.get("generate_report")
+        if generate_report is not None:
+            result = generate_report(db_path)
+            if isinstance(result, pd.DataFrame):
+                buf = _dataframe_to_arrow_bytes(result)
+                if len(buf) >= _SHM_MIN_BYTES:
+                    status = ("success_shm", _dataframe_to_shm(buf))
+                else:
+                    status = ("success_arrow", buf)
+            else:
+                status = ("success", result)
         else:
-            result_queue.put(("error", "Function 'generate_report(db_path)' not found"))
-        
-        conn.close()
+            status = ("error", "Function 'generate_report(db_path)' not found")
+
+        return status
 
     except Exception as e:
-        result_queue.put(("error", f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"))
+        return ("error", f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}")
 
 
 def _execute_report(code: str) -> tuple[bool, any, str]:
@@ -247,51 +452,82 @@ def _execute_report(code: str) -> tuple[bool, any, str]:
     if not is_safe:
         return False, None, f"Security scan failed: {error_msg}"
 
-    result_queue = multiprocessing.Queue()
-    process = multiprocessing.Process(
-        target=_execute_report_in_process,
-        args=(code, str(config.DB_PATH), result_queue)
-    )
-    process.start()
-    process.join(timeout=config.REPORT_TIMEOUT_SECONDS)
-
-    if process.is_alive():
-        process.terminate()
-        process.join()
+    future = _get_report_pool().submit(_execute_report_in_process, code, str(config.DB_PATH))
+    try:
+        status, result = future.result(timeout=config.REPORT_TIMEOUT_SECONDS)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        _recycle_report_pool()
         return False, None, f"Execution timeout ({config.REPORT_TIMEOUT_SECONDS}s). The report took too long to generate."
-
-    if result_queue.empty():
+    except concurrent.futures.process.BrokenProcessPool:
+        _recycle_report_pool()
         return False, None, "No result returned from report function"
 
-    status, result = result_queue.get()
     if status == "error":
         return False, None, result
 
+    if status == "success_arrow":
+        result = _arrow_bytes_to_dataframe(result)
+    elif status == "success_shm":
+        result = _dataframe_from_shm(*result)
+
     return True, result, ""
 
 
+_AUDIT_FH = open(config.LOGS_DIR / "execution_audit.jsonl", "a", buffering=1 << 16)
+_AUDIT_Q = queue.Queue()
+
+
+def _format_audit_entry(entry: dict) -> str:
+    entry["timestamp"] = datetime.fromtimestamp(entry.pop("ts_ns") / 1e9).isoformat()
+    return orjson.dumps(entry).decode()
+
+
+def _audit_drain():
+    while True:
+        entries = [_AUDIT_Q.get()]
+        while len(entries) < 64:
+            try:
+                entries.append(_AUDIT_Q.get(timeout=0.1))
+            except queue.Empty:
+                break
+        _AUDIT_FH.write("".join(_format_audit_entry(entry) + "\n" for entry in entries))
+        _AUDIT_FH.flush()
+
+
+threading.Thread(target=_audit_drain, daemon=True).start()
+
+
 def _log_execution(report_name: str, code: str, success: bool, error: str = ""):
-    log_entry = {
-        "timestamp": datetime.now().isoformat(),
+    _AUDIT_Q.put({
+        "ts_ns": time.time_ns(),
         "report_name": report_name,
         "success": success,
         "error": error[:500] if error else None,
-    }
-    with open(config.LOGS_DIR / "execution_audit.jsonl", "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    })
+
+
+_MASTER_PROMPT_CACHE = None
 
 
 def on_app_load():
+    global _MASTER_PROMPT_CACHE
     logger.info("Application starting, checking for new files...")
     results = db_manager.ingest_new_files()
     logger.info(f"Ingestion results: {results}")
+    if results["processed"]:
+        _MASTER_PROMPT_CACHE = None
     return f"Loaded. Processed {len(results['processed'])} files, {len(results['errors'])} errors."
 
 
 def generate_master_prompt():
+    global _MASTER_PROMPT_CACHE
+    if _MASTER_PROMPT_CACHE is not None:
+        return _MASTER_PROMPT_CACHE
+
     schema = db_manager.get_schema()
-    schema_str = json.dumps(schema, indent=2)
-    
+    schema_str = orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode()
+
     prompt = f'''You are an expert Python data analyst. Write a single Python function named generate_report(db_path). You must use sqlite3 to connect to the database and pandas to manipulate the data. Return either a Pandas DataFrame or a Gradio-compatible chart object.
 
 CRITICAL: Output ONLY raw, executable Python code. Do not include markdown formatting, backticks (```), explanations, or example usage. The code must be immediately executable by the Python exec() function.
@@ -301,12 +537,12 @@ Database Schema (columns in data_records table):
 
 Requirements:
 1. Use sqlite3.connect(db_path + "?mode=ro", uri=True) for read-only access
-2. Query data from the 'data_records' table (data_json column contains JSON)
-3. Parse JSON data using: pd.read_json or json.loads
-4. Return a pandas DataFrame or a Gradio-compatible chart object
-5. Do NOT use: import os, import sys, subprocess, shutil, open(), .to_csv(), .to_excel(), requests, socket, threading
-6. Do NOT write any code that modifies the database'''
-    
+2. Prefer df = load_records_df(db_path), a provided helper that returns the full 'data_records' table as a cached pandas DataFrame; use SQL on the 'data_records' table only for filtered/aggregated queries
+3. Return a pandas DataFrame or a Gradio-compatible chart object
+4. Do NOT use: import os, import sys, subprocess, shutil, open(), .to_csv(), .to_excel(), requests, socket, threading
+5. Do NOT write any code that modifies the database'''
+
+    _MASTER_PROMPT_CACHE = prompt
     return prompt
 
 
@@ -319,9 +555,8 @@ def run_selected_report(report_name: str):
     if not report_name or report_name == "Please select a report.":
         return "Please select a report from the dropdown."
     
-    reports = db_manager.get_reports()
-    report = next((r for r in reports if r["name"] == report_name), None)
-    
+    report = db_manager.get_report_by_name(report_name)
+
     if not report:
         return f"Report '{report_name}' not found."
     
@@ -342,17 +577,16 @@ def run_selected_report(report_name: str):
 
 def import_new_code(code: str, name: str):
     if not code or not name:
-        return "Please provide both code and a report name.", gr.update(choices=get_report_choices())
-    
-    is_safe, error_msg = _scan_code_safety(code)
-    if not is_safe:
-        return f"Security scan failed: {error_msg}", gr.update(choices=get_report_choices())
-    
-    success = db_manager.save_report(name, code)
-    if success:
-        return f"Report '{name}' saved successfully!", gr.update(choices=get_report_choices())
+        message = "Please provide both code and a report name."
     else:
-        return f"Report '{name}' already exists. Please use a different name.", gr.update(choices=get_report_choices())
+        is_safe, error_msg = _scan_code_safety(code)
+        if not is_safe:
+            message = f"Security scan failed: {error_msg}"
+        elif db_manager.save_report(name, code):
+            message = f"Report '{name}' saved successfully!"
+        else:
+            message = f"Report '{name}' already exists. Please use a different name."
+    return message, gr.update(choices=get_report_choices())
 
 
 with gr.Blocks(title="BI Dashboard", css=custom_css) as app: